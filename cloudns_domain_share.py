@@ -25,96 +25,241 @@ Authentication:
 """
 
 import argparse
+import asyncio
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import email.utils
+from enum import Enum
+import functools
+import httpx
+import itertools
 import json
 import os
+import random
+import re
 import requests
+from requests.adapters import HTTPAdapter
 import sys
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Callable, Deque, Iterable, Iterator, Optional, Tuple, TypeVar
+from urllib3.util.retry import Retry
+
+# Use orjson for parsing API responses when it is installed, as it is
+# considerably faster than the standard library on large list-zones pages
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+T = TypeVar("T")
 
 # ClouDNS API Configuration
 API_URL = "https://api.cloudns.net"
 
+# API endpoint URLs, built once rather than on every request
+LOGIN_URL = f"{API_URL}/login/login.json"
+PAGES_COUNT_URL = f"{API_URL}/dns/get-pages-count.json"
+LIST_ZONES_URL = f"{API_URL}/dns/list-zones.json"
+ADD_SHARED_ACCOUNT_URL = f"{API_URL}/dns/add-shared-account.json"
+LIST_SHARED_ACCOUNTS_URL = f"{API_URL}/dns/list-shared-accounts.json"
+
 # Default to environment variables if available
 AUTH_ID = os.environ.get("CLOUDNS_AUTH_ID", "")
 AUTH_PASSWORD = os.environ.get("CLOUDNS_AUTH_PASSWORD", "")
 
-def make_api_request(endpoint: str, params: Dict[str, Any]) -> Dict:
-    """Make an API request to ClouDNS and handle errors"""
-    # Check if we have auth credentials
-    if not AUTH_ID or not AUTH_PASSWORD:
-        print("Error: Missing authentication credentials.")
-        print("Please set CLOUDNS_AUTH_ID and CLOUDNS_AUTH_PASSWORD environment variables")
-        print("or provide --auth-id and --auth-password command-line arguments.")
-        sys.exit(1)
+# HTTP status codes worth retrying; any other 4xx is a permanent failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Matches the statusDescription the API returns when a domain is already shared
+_ALREADY_SHARED_RE = re.compile(r"already shared", re.I)
+
+# Matches the statusDescription the API returns for bad credentials
+_AUTH_FAILED_RE = re.compile(r"invalid authentication", re.I)
+
+# Number of attempts for each API request, including the first one
+MAX_ATTEMPTS = 3
+
+# Delay before the first retry, doubled on each further attempt, in seconds
+BASE_RETRY_DELAY = 1
+
+# Upper bound for the delay between retries, in seconds
+MAX_RETRY_DELAY = 30
+
+# Print retry attempts and other detail; set from --verbose
+VERBOSE = False
+
+# Number of concurrent share/verify requests
+DEFAULT_WORKERS = 8
+
+# Connections kept open by the shared session; set from --workers so every
+# worker thread can keep its own keep-alive connection
+HTTP_POOL_SIZE = DEFAULT_WORKERS
+
+# Maximum number of list-zones pages fetched concurrently
+PAGE_CONCURRENCY = 16
+
+# How long list-shared-accounts responses are cached, in seconds (0 disables caching)
+SHARED_ACCOUNTS_CACHE_TTL = 0.0
+
+# Cached list-shared-accounts lookups: domain -> (expiry timestamp, future response).
+# Storing the future lets concurrent lookups of the same domain share one request.
+_shared_accounts_cache: Dict[str, Tuple[float, Future]] = {}
+_shared_accounts_cache_lock = threading.Lock()
+
+class JitteredRetry(Retry):
+    """urllib3 Retry policy using the same backoff as the page fetcher
     
-    # Add auth parameters to every request
-    params["auth-id"] = AUTH_ID
-    params["auth-password"] = AUTH_PASSWORD
+    urllib3's own backoff does not wait at all before the first retry. This one
+    waits BASE_RETRY_DELAY before it and doubles the delay for each further retry,
+    with jitter and the MAX_RETRY_DELAY cap from jittered_delay. A Retry-After
+    header from the server is honoured but capped at MAX_RETRY_DELAY as well.
+    """
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_DELAY)
+
+    def get_backoff_time(self) -> float:
+        # Only count the last run of consecutive errors, as urllib3 does
+        consecutive_errors = len(
+            list(itertools.takewhile(lambda x: x.redirect_location is None, reversed(self.history)))
+        )
+        if consecutive_errors == 0:
+            return 0
+        return jittered_delay(min(BASE_RETRY_DELAY * 2 ** (consecutive_errors - 1), MAX_RETRY_DELAY))
+
+# Shared HTTP session, created on first use so keep-alive connections to the
+# API are reused across requests instead of re-doing the TLS handshake
+_SESSION: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Return the shared requests session, creating it on first use"""
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
     
-    url = f"{API_URL}/{endpoint}"
+    # Worker threads may all make their first request at once
+    with _session_lock:
+        if _SESSION is not None:
+            return _SESSION
+        session = requests.Session()
+        retries = JitteredRetry(
+            total=MAX_ATTEMPTS - 1,
+            status_forcelist=RETRYABLE_STATUS_CODES,
+            allowed_methods={"POST"},
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the last response to raise_for_status
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+        session.mount("https://", adapter)
+        _SESSION = session
+    return _SESSION
+
+class ClouDNSError(Exception):
+    """Raised when the API answers a request with status "Failed"
     
-    # Store the last response description as a global variable for error tracking
-    global _last_status_description
-    _last_status_description = ""
+    Attributes:
+        status_description: The statusDescription returned by the API
+        already_shared: True if the failure is because the domain is already shared
+        auth_failed: True if the failure is because the credentials were rejected
+    """
     
-    # Try the request up to 3 times with exponential backoff
-    max_retries = 3
-    retry_delay = 1
+    def __init__(self, status_description: str, already_shared: bool = False, auth_failed: bool = False):
+        super().__init__(status_description)
+        self.status_description = status_description
+        self.already_shared = already_shared
+        self.auth_failed = auth_failed
+
+class APIRequestError(Exception):
+    """Raised when a request cannot be completed (HTTP error, network failure or bad response)
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, data=params, timeout=30)
-            response.raise_for_status()  # Raise exception for 4xx and 5xx responses
-            
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                print(f"Error: Unable to parse API response: {response.text}")
-                if attempt < max_retries - 1:
-                    print(f"Retrying in {retry_delay} seconds... (Attempt {attempt + 1}/{max_retries})")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                sys.exit(1)
-            
-            # Check for API errors
-            if isinstance(data, dict) and data.get("status") == "Failed":
-                _last_status_description = data.get('statusDescription', 'Unknown error')
-                print(f"API Error: {_last_status_description}")
-                
-                # Don't exit for "already shared" errors to maintain backward compatibility
-                if "already shared" in _last_status_description.lower():
-                    return data
-                sys.exit(1)
-                
-            return data
-            
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                print(f"Network error: {str(e)}")
-                print(f"Retrying in {retry_delay} seconds... (Attempt {attempt + 1}/{max_retries})")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                print(f"Failed to connect to API after {max_retries} attempts: {str(e)}")
-                sys.exit(1)
+    Unlike ClouDNSError these are fatal for the whole run, so they are raised from
+    worker threads and only turned into an exit status by the __main__ guard.
+    """
+
+class PageFetchError(APIRequestError):
+    """Raised when a list-zones page cannot be fetched"""
+
+def _api_error(data: Dict[str, Any]) -> ClouDNSError:
+    """Build a ClouDNSError from a failed API response"""
+    status_desc = data.get('statusDescription', 'Unknown error')
+    return ClouDNSError(
+        status_desc,
+        already_shared=_ALREADY_SHARED_RE.search(status_desc) is not None,
+        auth_failed=_AUTH_FAILED_RE.search(status_desc) is not None,
+    )
+
+def jittered_delay(retry_delay: float) -> float:
+    """Add up to 50% random jitter to a retry delay, capped at MAX_RETRY_DELAY
+    
+    Jitter keeps concurrent workers from retrying in lockstep after a shared failure.
+    """
+    return min(retry_delay * (1 + random.uniform(0, 0.5)), MAX_RETRY_DELAY)
+
+def auth_params() -> Dict[str, str]:
+    """Return the auth parameters sent with every request, from AUTH_ID and AUTH_PASSWORD"""
+    return {"auth-id": AUTH_ID, "auth-password": AUTH_PASSWORD}
+
+def make_api_request(url: str, params: Dict[str, Any]) -> Dict:
+    """Make an API request to ClouDNS and handle errors
+    
+    Args:
+        url: The full endpoint URL, one of the *_URL constants
+        params: The request parameters, without authentication
+        
+    Raises:
+        ClouDNSError: If the API reports the request as failed
+        APIRequestError: If the credentials are missing or the request itself fails
+    """
+    # main() reports missing credentials up front; this guards direct callers
+    if not AUTH_ID or not AUTH_PASSWORD:
+        raise APIRequestError("Missing authentication credentials (CLOUDNS_AUTH_ID / CLOUDNS_AUTH_PASSWORD)")
+    
+    # Add auth parameters to every request without modifying the caller's dict.
+    # The body is encoded once here; the adapter's retries resend it as is.
+    body = {**params, **auth_params()}
+    
+    # Retries with backoff for network errors, 429 and 5xx are handled by the session's adapter
+    try:
+        response = get_session().post(url, data=body, timeout=30)
+        response.raise_for_status()  # Raise exception for 4xx and 5xx responses
+        data = json_loads(response.content)
+    except requests.exceptions.HTTPError as e:
+        raise APIRequestError(f"API request failed with HTTP {e.response.status_code}: {str(e)}") from e
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        raise APIRequestError(f"Failed to connect to API after {MAX_ATTEMPTS} attempts: {str(e)}") from e
+    except requests.exceptions.RequestException as e:
+        raise APIRequestError(f"API request error: {str(e)}") from e
+    except ValueError as e:  # json.JSONDecodeError and orjson.JSONDecodeError
+        raise APIRequestError(f"Unable to parse API response: {response.text}") from e
     
-    # This should never be reached, but just in case
-    print("Unexpected error in API request")
-    sys.exit(1)
+    # Check for API errors
+    if isinstance(data, dict) and data.get("status") == "Failed":
+        raise _api_error(data)
+    
+    return data
 
 def login() -> bool:
     """Test login credentials"""
     print("Testing login credentials...")
     try:
-        response = make_api_request("login/login.json", {})
+        response = make_api_request(LOGIN_URL, {})
         if response.get("status") == "Success":
             print("Login successful!")
             return True
         else:
             print(f"Login failed: {response.get('statusDescription', 'Unknown error')}")
             return False
+    except ClouDNSError as e:
+        print(f"Login failed: {e}")
+        return False
+    except APIRequestError:
+        raise
     except Exception as e:
         print(f"Login error: {str(e)}")
         return False
@@ -124,7 +269,7 @@ def get_total_pages(rows_per_page: int = 100) -> int:
     # From the API testing, it seems the returned response is just the number
     # rather than a dict with a "count" key
     params = {"rows-per-page": rows_per_page}
-    response = make_api_request("dns/get-pages-count.json", params)
+    response = make_api_request(PAGES_COUNT_URL, params)
     
     if isinstance(response, int):
         return response
@@ -138,43 +283,193 @@ def get_total_pages(rows_per_page: int = 100) -> int:
             print(f"Unexpected response format for pages count: {response}")
             return 1  # Default to 1 page if we can't determine
 
-def list_domains(all_pages: bool = True, page: int = 1, rows_per_page: int = 100) -> List[str]:
-    """List domains in the account
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or an HTTP date) into a delay capped at MAX_RETRY_DELAY
     
     Args:
-        all_pages: If True, fetch all pages of domains
-        page: The page number to fetch if all_pages is False
+        value: The header value, or None if the response did not send one
+        
+    Returns:
+        The delay in seconds, or None if the header is missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at is None:
+            return None
+        seconds = retry_at.timestamp() - time.time()
+    return min(max(seconds, 0), MAX_RETRY_DELAY)
+
+async def _wait_before_retry(page: int, error: str, attempt: int, max_retries: int,
+                             retry_delay: float, retry_after: Optional[float] = None) -> float:
+    """Sleep before retrying a page and return the backoff delay for the next retry
+    
+    Args:
+        page: The page number being fetched
+        error: Description of the error that triggered the retry
+        attempt: Zero-based number of the attempt that just failed
+        max_retries: Total number of attempts allowed
+        retry_delay: Current backoff delay in seconds
+        retry_after: Delay requested by the server's Retry-After header, if any
+        
+    Returns:
+        The doubled backoff delay, capped at MAX_RETRY_DELAY
+    """
+    sleep_for = retry_after if retry_after is not None else jittered_delay(retry_delay)
+    if VERBOSE:
+        print(f"Error fetching page {page}: {error}")
+        print(f"Retrying in {sleep_for:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+    await asyncio.sleep(sleep_for)
+    return min(retry_delay * 2, MAX_RETRY_DELAY)  # Exponential backoff
+
+async def _fetch_page(client: httpx.AsyncClient, page: int, rows_per_page: int) -> Any:
+    """Fetch a single page of the zone list
+    
+    Args:
+        client: The httpx client to send the request with
+        page: The page number to fetch
+        rows_per_page: Number of domains per page
+        
+    Returns:
+        The parsed JSON response for the page
+        
+    Raises:
+        PageFetchError: If the page fails with a permanent error or after all retries
+    """
+    params = {
+        **auth_params(),
+        "page": page,
+        "rows-per-page": rows_per_page
+    }
+    
+    # Try the request up to MAX_ATTEMPTS times with exponential backoff
+    max_retries = MAX_ATTEMPTS
+    retry_delay = BASE_RETRY_DELAY
+    
+    for attempt in range(max_retries):
+        retry_after = None
+        try:
+            response = await client.post(LIST_ZONES_URL, data=params)
+            response.raise_for_status()
+            data = json_loads(response.content)
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            error = f"HTTP {status} {e.response.reason_phrase}"
+            if status not in RETRYABLE_STATUS_CODES:
+                raise PageFetchError(f"Failed to fetch page {page}: {error}")
+            retry_after = _parse_retry_after(e.response.headers.get("Retry-After"))
+        except (httpx.TransportError, ValueError) as e:
+            error = str(e)
+        else:
+            if isinstance(data, dict) and data.get("status") == "Failed":
+                raise _api_error(data)
+            return data
+        
+        if attempt == max_retries - 1:
+            raise PageFetchError(f"Failed to fetch page {page} after {max_retries} attempts: {error}")
+        retry_delay = await _wait_before_retry(page, error, attempt, max_retries, retry_delay, retry_after)
+
+async def _page_batches(total_pages: int, rows_per_page: int) -> AsyncIterator[List[Any]]:
+    """Fetch pages of the zone list in concurrent batches over one HTTP/2 client
+    
+    When the server negotiates HTTP/2 the concurrent requests are multiplexed over
+    a single connection; otherwise httpx falls back to a pool of HTTP/1.1 keep-alive
+    connections.
+    
+    Args:
+        total_pages: Number of pages to fetch
+        rows_per_page: Number of domains per page
+        
+    Yields:
+        Lists of up to PAGE_CONCURRENCY parsed page responses, in page order
+    """
+    limits = httpx.Limits(max_connections=PAGE_CONCURRENCY)
+    # No pool timeout, so time spent queued for a pooled connection doesn't count
+    timeout = httpx.Timeout(30, pool=None)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=timeout) as client:
+        for batch_start in range(1, total_pages + 1, PAGE_CONCURRENCY):
+            batch_end = min(batch_start + PAGE_CONCURRENCY, total_pages + 1)
+            tasks = [
+                asyncio.ensure_future(_fetch_page(client, page, rows_per_page))
+                for page in range(batch_start, batch_end)
+            ]
+            try:
+                batch = await asyncio.gather(*tasks)
+            except BaseException:
+                # Don't leave the rest of the batch running once one page has failed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            yield batch
+
+def iter_pages(total_pages: int, rows_per_page: int) -> Iterator[Any]:
+    """Iterate over the zone list pages, fetching them concurrently in batches
+    
+    Only one batch of pages is held in memory at a time, and the same httpx
+    client is kept open across batches.
+    
+    Args:
+        total_pages: Number of pages to fetch
         rows_per_page: Number of domains per page
         
+    Yields:
+        Parsed page responses, in page order
+    """
+    loop = asyncio.new_event_loop()
+    batches = _page_batches(total_pages, rows_per_page)
+    try:
+        while True:
+            try:
+                batch = loop.run_until_complete(batches.__anext__())
+            except StopAsyncIteration:
+                break
+            yield from batch
+    finally:
+        loop.run_until_complete(batches.aclose())
+        loop.close()
+
+def extract_domain_names(response: Any) -> Optional[List[str]]:
+    """Extract the domain names from a list-zones page
+    
+    Args:
+        response: The parsed list-zones response
+        
     Returns:
-        List of domain names
+        List of domain names, or None if the response format is not recognised
     """
-    domains = []
+    # The actual response is a list of dictionaries; exact type checks are
+    # cheaper than isinstance for the parsed JSON types
+    if type(response) is list:
+        return [zone['name'] for zone in response if type(zone) is dict and 'name' in zone]
+    # If it's still a dict, try the old way
+    if type(response) is dict:
+        return list(response.keys())
+    return None
+
+def iter_domains(all_pages: bool = True, page: int = 1, rows_per_page: int = 100) -> Iterator[str]:
+    """Iterate over the domains in the account as their pages arrive
     
+    Args:
+        all_pages: If True, fetch all pages of domains
+        page: The page number to fetch if all_pages is False
+        rows_per_page: Number of domains per page
+        
+    Yields:
+        Domain names
+    """
     if all_pages:
         total_pages = get_total_pages(rows_per_page)
         print(f"Fetching all domains across {total_pages} pages...")
-        
-        for current_page in range(1, total_pages + 1):
-            print(f"Fetching page {current_page}/{total_pages}...")
-            
-            params = {
-                "page": current_page,
-                "rows-per-page": rows_per_page
-            }
-            
-            response = make_api_request("dns/list-zones.json", params)
-            
-            # The actual response appears to be a list of dictionaries
-            if isinstance(response, list):
-                for domain_data in response:
-                    if isinstance(domain_data, dict) and 'name' in domain_data:
-                        domains.append(domain_data['name'])
-            # If it's still a dict, try the old way
-            elif isinstance(response, dict):
-                domains.extend(list(response.keys()))
-            else:
-                print(f"Unexpected response format on page {current_page}: {response}")
+        first_page = 1
+        responses = iter_pages(total_pages, rows_per_page)
     else:
         print(f"Fetching domains from page {page}...")
         
@@ -183,23 +478,76 @@ def list_domains(all_pages: bool = True, page: int = 1, rows_per_page: int = 100
             "rows-per-page": rows_per_page
         }
         
-        response = make_api_request("dns/list-zones.json", params)
+        first_page = page
+        responses = iter([make_api_request(LIST_ZONES_URL, params)])
+    
+    for current_page, response in enumerate(responses, start=first_page):
+        names = extract_domain_names(response)
+        if names is None:
+            print(f"Unexpected response format on page {current_page}: {response}")
+        else:
+            yield from names
+
+def get_shared_accounts(domain: str) -> Any:
+    """Fetch the accounts a domain is shared with, using the response cache if enabled
+    
+    Args:
+        domain: The domain name to look up
         
-        # The actual response appears to be a list of dictionaries
-        if isinstance(response, list):
-            for domain_data in response:
-                if isinstance(domain_data, dict) and 'name' in domain_data:
-                    domains.append(domain_data['name'])
-        # If it's still a dict, try the old way
-        elif isinstance(response, dict):
-            domains = list(response.keys())
+    Returns:
+        The list-shared-accounts API response
+    """
+    if SHARED_ACCOUNTS_CACHE_TTL <= 0:
+        return make_api_request(LIST_SHARED_ACCOUNTS_URL, {"domain-name": domain})
+    
+    with _shared_accounts_cache_lock:
+        cached = _shared_accounts_cache.get(domain)
+        if cached and cached[0] > time.monotonic():
+            # Cached or already being fetched by another worker
+            future = cached[1]
+            is_owner = False
         else:
-            print(f"Unexpected response format: {response}")
+            future = Future()
+            _shared_accounts_cache[domain] = (time.monotonic() + SHARED_ACCOUNTS_CACHE_TTL, future)
+            is_owner = True
+    
+    if not is_owner:
+        return future.result()
     
-    return domains
+    try:
+        response = make_api_request(LIST_SHARED_ACCOUNTS_URL, {"domain-name": domain})
+    except BaseException as e:
+        # Don't cache failures, but pass them on to any waiting workers
+        with _shared_accounts_cache_lock:
+            if _shared_accounts_cache.get(domain, (0, None))[1] is future:
+                del _shared_accounts_cache[domain]
+        future.set_exception(e)
+        raise
+    
+    future.set_result(response)
+    return response
+
+def invalidate_shared_accounts(domain: str) -> None:
+    """Drop the cached list-shared-accounts response for a domain"""
+    with _shared_accounts_cache_lock:
+        _shared_accounts_cache.pop(domain, None)
 
-def share_domain(domain: str, email: str) -> bool:
-    """Share a domain with another user by email"""
+class ShareResult(Enum):
+    """Result of a single share_domain call"""
+    SUCCESS = "success"
+    ALREADY_SHARED = "already shared"
+    FAILED = "failed"
+
+def share_domain(domain: str, email: str) -> ShareResult:
+    """Share a domain with another user by email
+    
+    Args:
+        domain: The domain name to share
+        email: The email address to share the domain with
+        
+    Returns:
+        ShareResult saying whether the domain was shared, already shared or failed
+    """
     print(f"Sharing domain {domain} with {email}...")
     
     params = {
@@ -208,92 +556,151 @@ def share_domain(domain: str, email: str) -> bool:
     }
     
     try:
-        response = make_api_request("dns/add-shared-account.json", params)
+        response = make_api_request(ADD_SHARED_ACCOUNT_URL, params)
         if response.get("status") == "Success":
+            invalidate_shared_accounts(domain)
             print(f"Successfully shared {domain} with {email}")
-            return True
+            return ShareResult.SUCCESS
         else:
             status_desc = response.get('statusDescription', 'Unknown error')
-            if "already shared" in status_desc.lower():
-                print(f"Domain {domain} is already shared with {email}")
-                return True  # Consider already shared as success
-            else:
-                print(f"Failed to share {domain}: {status_desc}")
-                return False
+            print(f"Failed to share {domain}: {status_desc}")
+            return ShareResult.FAILED
+    except ClouDNSError as e:
+        if e.auth_failed:
+            raise  # Every other domain would fail the same way
+        if e.already_shared:
+            print(f"Domain {domain} is already shared with {email}")
+            return ShareResult.ALREADY_SHARED  # Already shared is not a failure
+        print(f"Failed to share {domain}: {e}")
+        return ShareResult.FAILED
+    except APIRequestError:
+        raise  # Fatal for the whole run, not just this domain
     except Exception as e:
         print(f"Error sharing domain {domain}: {str(e)}")
+        return ShareResult.FAILED
+
+def extract_shared_emails(items: List[Any]) -> List[str]:
+    """Extract the email addresses from a list of shared accounts
+    
+    Args:
+        items: Shared accounts, either email strings or dicts with a mail/email key
+        
+    Returns:
+        List of shared email addresses
+    """
+    # Items are either direct string emails or dictionaries with a mail/email key
+    return [
+        item if type(item) is str else item['mail'] if 'mail' in item else item['email']
+        for item in items
+        if type(item) is str or (type(item) is dict and ('mail' in item or 'email' in item))
+    ]
+
+def report_sharing(domain: str, shared_emails: List[str], email: Optional[str] = None) -> bool:
+    """Report who a domain is shared with and check it against an email (if provided)
+    
+    Args:
+        domain: The domain name being verified
+        shared_emails: Email addresses the domain is shared with
+        email: The email address the domain should be shared with
+        
+    Returns:
+        True if the domain is shared (with the given email, if provided)
+    """
+    if not shared_emails:
+        print(f"Domain {domain} is not shared with anyone")
         return False
+    
+    # If email is provided, check if it's in the list
+    if email:
+        # Check both lowercase and original case
+        email_lower = email.lower().strip()
+        shared_emails_lower = [e.lower().strip() for e in shared_emails]
+        
+        if email_lower in shared_emails_lower:
+            print(f"Domain {domain} is shared with {email}")
+            return True
+        else:
+            print(f"Domain {domain} is not shared with {email}")
+            print(f"It is shared with: {', '.join(shared_emails)}")
+            return False
+    else:
+        # Just list all shared accounts
+        print(f"Domain {domain} is shared with: {', '.join(shared_emails)}")
+        return True
 
 def verify_sharing(domain: str, email: Optional[str] = None) -> bool:
     """Verify that a domain is shared with a specific email (if provided)"""
     print(f"Verifying sharing for domain {domain}...")
     
-    params = {
-        "domain-name": domain
-    }
-    
     try:
-        response = make_api_request("dns/list-shared-accounts.json", params)
-        
-        # If the response is a dictionary with status, the domain isn't shared
-        if isinstance(response, dict) and response.get("status") == "Failed":
-            print(f"Domain {domain} is not shared with anyone")
-            return False
+        response = get_shared_accounts(domain)
         
         # If response is a list, it contains the shared emails
         if isinstance(response, list):
-            if not response:
-                print(f"Domain {domain} is not shared with anyone")
-                return False
-                
-            # Extract shared emails - the API returns a list of strings (emails)
-            shared_emails = []
-            for item in response:
-                if isinstance(item, str):
-                    # Direct string email in the list
-                    shared_emails.append(item)
-                elif isinstance(item, dict):
-                    # Dictionary with mail/email key
-                    if 'mail' in item:
-                        shared_emails.append(item.get('mail'))
-                    elif 'email' in item:
-                        shared_emails.append(item.get('email'))
-            
-            # If email is provided, check if it's in the list
-            if email:
-                # Check both lowercase and original case
-                email_lower = email.lower().strip()
-                shared_emails_lower = [e.lower().strip() for e in shared_emails]
-                
-                if email_lower in shared_emails_lower:
-                    print(f"Domain {domain} is shared with {email}")
-                    return True
-                else:
-                    print(f"Domain {domain} is not shared with {email}")
-                    print(f"It is shared with: {', '.join(shared_emails)}")
-                    return False
-            else:
-                # Just list all shared accounts
-                print(f"Domain {domain} is shared with: {', '.join(shared_emails)}")
-                return bool(shared_emails)
+            return report_sharing(domain, extract_shared_emails(response), email)
         
         print(f"Unexpected response format for domain {domain}: {response}")
         return False
         
+    except ClouDNSError as e:
+        if e.auth_failed:
+            raise  # Every other domain would fail the same way
+        # A failed lookup means the domain isn't shared
+        print(f"Domain {domain} is not shared with anyone ({e})")
+        return False
+    except APIRequestError:
+        raise  # Fatal for the whole run, not just this domain
     except Exception as e:
         print(f"Error verifying sharing for domain {domain}: {str(e)}")
         return False
 
-def load_domains_from_file(file_path: str) -> List[str]:
-    """Load domains from a text file, one domain per line"""
+def iter_domains_from_file(file_path: str) -> Iterator[str]:
+    """Iterate over the domains in a text file, one domain per line
+    
+    The file is read lazily, so sharing can start before a large file has been read.
+    """
     try:
         with open(file_path, 'r') as f:
-            domains = [line.strip() for line in f if line.strip()]
-        return domains
+            for line in f:
+                domain = line.strip()
+                if domain:
+                    yield domain
     except Exception as e:
         print(f"Error loading domains from file {file_path}: {str(e)}")
         sys.exit(1)
 
+def run_concurrently(func: Callable[[str], T], items: Iterable[str], workers: int) -> Iterator[Tuple[str, T]]:
+    """Run func over items on a thread pool, yielding results in input order
+    
+    Unlike Executor.map, items are pulled from the iterable only as workers free up,
+    so at most a few items per worker are in flight at any time.
+    
+    Args:
+        func: The function to call for each item
+        items: The items to process
+        workers: Number of worker threads
+        
+    Yields:
+        Tuples of (item, result)
+    """
+    max_pending = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Tuple[str, Future]] = deque()
+        try:
+            for item in items:
+                pending.append((item, executor.submit(func, item)))
+                if len(pending) >= max_pending:
+                    done_item, future = pending.popleft()
+                    yield done_item, future.result()
+            while pending:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        finally:
+            # On an error (or if the caller stops early) drop the queued work rather
+            # than letting the executor run it all before shutting down
+            for _, future in pending:
+                future.cancel()
+
 def main():
     parser = argparse.ArgumentParser(description="ClouDNS Domain Sharing Tool")
     group = parser.add_mutually_exclusive_group(required=True)
@@ -306,6 +713,10 @@ def main():
     parser.add_argument("--email", type=str, help="Email address to share domains with")
     parser.add_argument("--output-file", type=str, help="Output file for domain list")
     parser.add_argument("--verbose", action="store_true", help="Show detailed log information")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent share/verify requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--cache-ttl", type=float, default=0,
+                        help="Seconds to cache shared-account lookups when verifying (default: 0, disabled)")
     
     # Authentication arguments
     parser.add_argument("--auth-id", type=str, help="ClouDNS Auth ID (overrides CLOUDNS_AUTH_ID env var)")
@@ -313,6 +724,11 @@ def main():
     
     args = parser.parse_args()
     
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.cache_ttl < 0:
+        parser.error("--cache-ttl cannot be negative")
+    
     # Set global auth variables from command-line args if provided
     global AUTH_ID, AUTH_PASSWORD
     if args.auth_id:
@@ -320,8 +736,20 @@ def main():
     if args.auth_password:
         AUTH_PASSWORD = args.auth_password
     
-    # Login to ensure credentials are valid
-    if not login():
+    global HTTP_POOL_SIZE, SHARED_ACCOUNTS_CACHE_TTL, VERBOSE
+    HTTP_POOL_SIZE = args.workers
+    SHARED_ACCOUNTS_CACHE_TTL = args.cache_ttl
+    VERBOSE = args.verbose
+    
+    if not AUTH_ID or not AUTH_PASSWORD:
+        print("Error: Missing authentication credentials.")
+        print("Please set CLOUDNS_AUTH_ID and CLOUDNS_AUTH_PASSWORD environment variables")
+        print("or provide --auth-id and --auth-password command-line arguments.")
+        sys.exit(1)
+    
+    # Only test the login up front when asked to; otherwise bad credentials are
+    # reported by the first real request, saving a round trip
+    if (args.test_login or args.verbose) and not login():
         sys.exit(1)
     
     # Handle test login (do nothing else)
@@ -331,22 +759,26 @@ def main():
     
     # Handle listing domains
     if args.list_domains:
-        domains = list_domains(all_pages=True)
-        print(f"Found {len(domains)} domains")
+        # Domains are written out as their pages arrive rather than collected first
+        domain_count = 0
         
         # If output file is provided, write domains to file
         if args.output_file:
             try:
                 with open(args.output_file, 'w') as f:
-                    for domain in domains:
+                    for domain in iter_domains(all_pages=True):
                         f.write(f"{domain}\n")
+                        domain_count += 1
                 print(f"Domain list saved to {args.output_file}")
-            except Exception as e:
+            except OSError as e:
                 print(f"Error writing to output file: {str(e)}")
         else:
             # Otherwise, print to console
-            for domain in domains:
+            for domain in iter_domains(all_pages=True):
                 print(domain)
+                domain_count += 1
+        
+        print(f"Found {domain_count} domains")
     
     # Handle sharing domains
     elif args.share_domains or args.share_file:
@@ -354,73 +786,81 @@ def main():
             print("Error: --email is required when sharing domains")
             sys.exit(1)
         
-        # Get domains from file or command line argument
+        # Get domains from file or command line argument; the file is streamed
         if args.share_file:
-            domains = load_domains_from_file(args.share_file)
-            print(f"Loaded {len(domains)} domains from {args.share_file}")
+            domains = iter_domains_from_file(args.share_file)
+            print(f"Loading domains from {args.share_file}")
         else:
-            domains = [d.strip() for d in args.share_domains.split(",")]
-            print(f"Processing {len(domains)} domains from command line")
+            domain_list = [d.strip() for d in args.share_domains.split(",")]
+            domains = iter(domain_list)
+            print(f"Processing {len(domain_list)} domains from command line")
         
-        if len(domains) == 0:
+        first_domain = next(domains, None)
+        if first_domain is None:
             print("No domains to share. Exiting.")
             sys.exit(0)
         
-        # Share each domain
-        success_count = 0
-        already_shared_count = 0
+        # Share the domains concurrently, each request is independent
+        counts: Counter = Counter()
         failed_domains = []
         
-        for domain in domains:
-            try:
-                if share_domain(domain, args.email):
-                    success_count += 1
-                    # Check if it was already shared
-                    if "already shared" in globals().get("_last_status_description", "").lower():
-                        already_shared_count += 1
-                else:
-                    failed_domains.append(domain)
-            except Exception as e:
-                print(f"Unexpected error sharing {domain}: {str(e)}")
+        share = functools.partial(share_domain, email=args.email)
+        for domain, result in run_concurrently(share, itertools.chain([first_domain], domains), args.workers):
+            counts[result] += 1
+            if result is ShareResult.FAILED:
                 failed_domains.append(domain)
         
-        print(f"\nSummary:")
-        print(f"- Total domains processed: {len(domains)}")
-        print(f"- Successfully shared: {success_count - already_shared_count}")
-        print(f"- Already shared: {already_shared_count}")
-        print(f"- Failed: {len(failed_domains)}")
+        summary = [
+            "\nSummary:",
+            f"- Total domains processed: {sum(counts.values())}",
+            f"- Successfully shared: {counts[ShareResult.SUCCESS]}",
+            f"- Already shared: {counts[ShareResult.ALREADY_SHARED]}",
+            f"- Failed: {counts[ShareResult.FAILED]}",
+        ]
         
         if failed_domains and args.verbose:
-            print("\nFailed domains:")
-            for domain in failed_domains:
-                print(f"- {domain}")
+            summary.append("\nFailed domains:")
+            summary.extend(f"- {domain}" for domain in failed_domains)
+        
+        print("\n".join(summary))
     
     # Handle verifying sharing
     elif args.verify_sharing:
         domains = [d.strip() for d in args.verify_sharing.split(",")]
         
-        # Verify sharing for each domain
+        # Verify sharing for the domains concurrently
         success_count = 0
         failed_domains = []
         
-        for domain in domains:
-            if verify_sharing(domain, args.email):
+        verify = functools.partial(verify_sharing, email=args.email)
+        for domain, is_shared in run_concurrently(verify, domains, args.workers):
+            if is_shared:
                 success_count += 1
             else:
                 failed_domains.append(domain)
         
-        print(f"\nSummary:")
-        print(f"- Total domains verified: {len(domains)}")
-        print(f"- Successfully shared: {success_count}")
-        print(f"- Not shared: {len(failed_domains)}")
+        summary = [
+            "\nSummary:",
+            f"- Total domains verified: {len(domains)}",
+            f"- Successfully shared: {success_count}",
+            f"- Not shared: {len(failed_domains)}",
+        ]
         
         if args.email:
-            print(f"- Shared with: {args.email}")
+            summary.append(f"- Shared with: {args.email}")
             
         if failed_domains and args.verbose:
-            print("\nNot shared domains:")
-            for domain in failed_domains:
-                print(f"- {domain}")
+            summary.append("\nNot shared domains:")
+            summary.extend(f"- {domain}" for domain in failed_domains)
+        
+        print("\n".join(summary))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except ClouDNSError as e:
+        print(f"API Error: {e}")
+        sys.exit(1)
+    except APIRequestError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
\ No newline at end of file